@@ -0,0 +1,53 @@
+# distutils: language = c++
+# distutils: sources = engine.cpp
+# cython: language_level = 3
+# Optional Cython binding for get_best_move. Build in place with: cythonize -i _engine.pyx
+from libc.string cimport memset
+
+cdef extern from "engine.h":
+    cdef struct Step:
+        int r1, c1, r2, c2
+    cdef struct MoveResult:
+        Step steps[12]
+        int count, score, depth, nodes
+        int depth_live, score_live # volatile in engine.h
+    void get_best_move(int* flat_board, int player, double limit_sec, int max_depth, MoveResult* result) nogil
+    void abort_search_c "abort_search"() nogil
+
+cdef class SearchSlot:
+    """Result struct of one search; depth_live/score_live can be polled while it runs."""
+    cdef MoveResult result
+
+    def __cinit__(self):
+        self.clear()
+
+    def clear(self):
+        memset(&self.result, 0, sizeof(self.result))
+
+    @property
+    def depth_live(self): return self.result.depth_live
+
+    @property
+    def score_live(self): return self.result.score_live
+
+def best_move(int[::1] board, int player, double tlimit, int maxd, SearchSlot slot=None):
+    """Search a 64-cell int board buffer (no copy); returns (packed steps, score, depth, nodes).
+    Pass a cleared SearchSlot to read progress from another thread during the search."""
+    if board.shape[0] != 64:
+        raise ValueError("board must hold 64 C ints")
+    if slot is None:
+        slot = SearchSlot()
+    cdef MoveResult* result = &slot.result
+    cdef Step s
+    cdef int i
+    with nogil:
+        get_best_move(&board[0], player, tlimit, maxd, result)
+    steps = []
+    for i in range(result.count):
+        s = result.steps[i]
+        steps.append((s.r1 << 18) | (s.c1 << 12) | (s.r2 << 6) | s.c2)
+    return tuple(steps), result.score, result.depth, result.nodes
+
+def abort_search():
+    """Ask the running best_move search to stop at its next node (callable from any thread)."""
+    abort_search_c()
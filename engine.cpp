@@ -14,13 +14,9 @@
 #include <random>
 #include <cmath>
 
-#ifdef _WIN32
-#define DLLEXPORT extern "C" __declspec(dllexport)
-#else
-#define DLLEXPORT extern "C"
-#endif
+#include "engine.h"
 
-const int TT_SIZE = 1 << 24; 
+int tt_size = 1 << 24; // entries, see init_tt
 const int INF = 1000000;
 const int MATE = 900000;
 const int MAX_PLY = 64;
@@ -32,8 +28,6 @@ const int BLACK_KING = 3;
 const int WHITE_KING = 4;
 const int GHOST = 7; 
 
-struct Step { int r1, c1, r2, c2; };
-struct MoveResult { Step steps[12]; int count; int score; int depth; int nodes; };
 struct Move { 
     Step steps[12]; int count; int score; 
     bool operator>(const Move& other) const { return score > other.score; }
@@ -63,7 +57,7 @@ int history_table[2][64][64];
 Move killer_moves[MAX_PLY][2]; 
 std::chrono::time_point<std::chrono::high_resolution_clock> start_time;
 double time_limit_sec;
-bool stop_search = false;
+volatile bool stop_search = false; // also set from another thread by abort_search
 long long nodes_visited = 0;
 
 std::string move_to_str(const Move& m);
@@ -132,21 +126,21 @@ TTEntry* transposition_table = nullptr;
 
 void init_memory() {
     if (transposition_table == nullptr) {
-        transposition_table = new TTEntry[TT_SIZE];
-        std::memset(transposition_table, 0, TT_SIZE * sizeof(TTEntry));
+        transposition_table = new TTEntry[tt_size];
+        std::memset(transposition_table, 0, tt_size * sizeof(TTEntry));
         init_zobrist();
     }
 }
 
 void tt_save(unsigned long long key, int score, int depth, int flag, const Move& best_move) {
-    int idx = key % TT_SIZE;
+    int idx = key % tt_size;
     if (transposition_table[idx].key != key || depth >= transposition_table[idx].depth) {
         transposition_table[idx] = {key, score, depth, flag, best_move};
     }
 }
 
 bool tt_probe(unsigned long long key, int depth, int alpha, int beta, int& score, Move& tt_move) {
-    int idx = key % TT_SIZE;
+    int idx = key % tt_size;
     if (transposition_table[idx].key == key) {
         tt_move = transposition_table[idx].best_move;
         if (transposition_table[idx].depth >= depth) {
@@ -352,6 +346,15 @@ void find_captures_recursive(int board[64], int r, int c, int piece, Move curren
     if (!found_continuation && current_move.count > 0) moves.push_back(current_move);
 }
 
+// Majority rule: only the sequences capturing the most pieces are legal
+void keep_longest_captures(MoveList& moves) {
+    int max_capture_count = 0;
+    for(int i=0; i<moves.count; i++) if (moves[i].count > max_capture_count) max_capture_count = moves[i].count;
+    int write_idx = 0;
+    for(int i=0; i<moves.count; i++) if (moves[i].count == max_capture_count) moves[write_idx++] = moves[i];
+    moves.count = write_idx;
+}
+
 void generate_moves(int board[64], int player, MoveList& moves) {
     moves.clear();
     bool is_white = (player == WHITE_MAN || player == WHITE_KING);
@@ -365,11 +368,7 @@ void generate_moves(int board[64], int player, MoveList& moves) {
         }
     }
     if (moves.count > 0) {
-        int max_capture_count = 0;
-        for(int i=0; i<moves.count; i++) if (moves[i].count > max_capture_count) max_capture_count = moves[i].count;
-        int write_idx = 0;
-        for(int i=0; i<moves.count; i++) if (moves[i].count == max_capture_count) moves[write_idx++] = moves[i];
-        moves.count = write_idx;
+        keep_longest_captures(moves);
         return; 
     }
     for(int r=0; r<8; r++) {
@@ -575,9 +574,36 @@ std::string move_to_str(const Move& m) {
     return ss.str();
 }
 
+// Copies sequences into caller buffers: steps of sequence i start at out_steps[i*12]
+int export_moves(const MoveList& moves, Step* out_steps, int* out_lens, int max_seqs) {
+    int n = std::min(moves.count, max_seqs);
+    for(int i=0; i<n; i++) {
+        out_lens[i] = moves[i].count;
+        std::memcpy(out_steps + i*12, moves[i].steps, moves[i].count*sizeof(Step));
+    }
+    return n;
+}
+
+DLLEXPORT int gen_legal_moves(const int* flat_board, int player, Step* out_steps, int* out_lens, int max_seqs) {
+    int board[64]; std::memcpy(board, flat_board, 64*sizeof(int));
+    MoveList moves;
+    generate_moves(board, player, moves);
+    return export_moves(moves, out_steps, out_lens, max_seqs);
+}
+
+DLLEXPORT int find_captures_from(const int* flat_board, int r, int c, int piece, Step* out_steps, int* out_lens, int max_seqs) {
+    int board[64]; std::memcpy(board, flat_board, 64*sizeof(int));
+    MoveList moves;
+    Move m; m.count = 0; m.score = 0;
+    find_captures_recursive(board, r, c, piece, m, moves);
+    if (moves.count > 0) keep_longest_captures(moves);
+    return export_moves(moves, out_steps, out_lens, max_seqs);
+}
+
 DLLEXPORT void get_best_move(int* flat_board, int player, double limit_sec, int max_depth, MoveResult* result) {
     init_memory();
     int board[64]; std::memcpy(board, flat_board, 64*sizeof(int));
+    result->depth_live = 0; result->score_live = 0;
     
     log_file("%s", board_to_str(board).c_str());
 
@@ -637,6 +663,8 @@ DLLEXPORT void get_best_move(int* flat_board, int player, double limit_sec, int
         best_overall = current_best_move;
         best_score_overall = current_best_score;
         reached_depth = d;
+        result->score_live = best_score_overall;
+        result->depth_live = d;
 
         log_file("DEPTH %2d | Score: %6d | Move: %s", d, best_score_overall, move_to_str(best_overall).c_str());
         if (best_score_overall > MATE - 5000) break; 
@@ -654,4 +682,37 @@ DLLEXPORT void get_best_move(int* flat_board, int player, double limit_sec, int
     log_final_move(best_overall, player, result->score, reached_depth);
 }
 
+// Ends the running search at its next node; callers repeat it until the search returns
+DLLEXPORT void abort_search() {
+    stop_search = true;
+}
+
+// Allocates the table up front; the size only applies if no search has allocated it yet
+DLLEXPORT void init_tt(int entries) {
+    if (transposition_table == nullptr && entries > 0) tt_size = entries;
+    init_memory();
+}
+
+// Fixed-depth search of one root move inside the (alpha, beta) window, from the mover's side
+DLLEXPORT void search_move(const int* flat_board, int player, const Step* steps, int count, int depth, int alpha, int beta, double limit_sec, SubtreeResult* result) {
+    init_memory();
+    int board[64]; std::memcpy(board, flat_board, 64*sizeof(int));
+    Move m; m.count = std::min(count, 12); m.score = 0;
+    std::memcpy(m.steps, steps, m.count*sizeof(Step));
+
+    start_time = std::chrono::high_resolution_clock::now();
+    time_limit_sec = limit_sec;
+    stop_search = false;
+    nodes_visited = 0;
+
+    int piece = board[m.steps[0].r1 * 8 + m.steps[0].c1];
+    int extension = is_promotion_move(m, piece) ? 1 : 0;
+    int captured = 0; apply_move(board, m, player, captured);
+    int enemy = (player == WHITE_MAN || player == WHITE_KING) ? BLACK_MAN : WHITE_MAN;
+
+    result->score = -alpha_beta(board, depth - 1 + extension, -beta, -alpha, enemy, 1, true);
+    result->completed = stop_search ? 0 : 1;
+    result->nodes = (int)nodes_visited;
+}
+
 int main() { return 0; }
\ No newline at end of file
@@ -0,0 +1,22 @@
+#ifndef WAYLON_ENGINE_H
+#define WAYLON_ENGINE_H
+
+#ifdef _WIN32
+#define DLLEXPORT extern "C" __declspec(dllexport)
+#else
+#define DLLEXPORT extern "C"
+#endif
+
+struct Step { int r1, c1, r2, c2; };
+// depth_live/score_live: last completed iteration, written during the search for the GUI to poll
+struct MoveResult { Step steps[12]; int count; int score; int depth; int nodes; volatile int depth_live; volatile int score_live; };
+struct SubtreeResult { int score; int completed; int nodes; };
+
+DLLEXPORT int gen_legal_moves(const int* flat_board, int player, Step* out_steps, int* out_lens, int max_seqs);
+DLLEXPORT int find_captures_from(const int* flat_board, int r, int c, int piece, Step* out_steps, int* out_lens, int max_seqs);
+DLLEXPORT void get_best_move(int* flat_board, int player, double limit_sec, int max_depth, MoveResult* result);
+DLLEXPORT void abort_search();
+DLLEXPORT void init_tt(int entries);
+DLLEXPORT void search_move(const int* flat_board, int player, const Step* steps, int count, int depth, int alpha, int beta, double limit_sec, SubtreeResult* result);
+
+#endif
@@ -8,6 +8,9 @@ import logging
 import traceback
 import ctypes
 import os
+import random
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 
 DLL_NAME = "engine.dll"
@@ -21,6 +24,11 @@ except Exception as e:
     messagebox.showerror("Engine error", f"Critical error: {e}")
     sys.exit(1)
 
+try:
+    import _engine # optional Cython binding (_engine.pyx), ctypes is used without it
+except ImportError:
+    _engine = None
+
 # Types definitions for Python
 class Step(ctypes.Structure):
     _fields_ = [("r1", ctypes.c_int), ("c1", ctypes.c_int),
@@ -32,9 +40,14 @@ class MoveResult(ctypes.Structure):
         ("count", ctypes.c_int),
         ("score", ctypes.c_int),
         ("depth", ctypes.c_int),
-        ("nodes", ctypes.c_int)
+        ("nodes", ctypes.c_int),
+        ("depth_live", ctypes.c_int), # progress, written by the engine while searching
+        ("score_live", ctypes.c_int)
     ]
 
+class SubtreeResult(ctypes.Structure):
+    _fields_ = [("score", ctypes.c_int), ("completed", ctypes.c_int), ("nodes", ctypes.c_int)]
+
 # C++ function configuration
 cpp_lib.get_best_move.argtypes = [
     ctypes.POINTER(ctypes.c_int), # flat board
@@ -44,140 +57,469 @@ cpp_lib.get_best_move.argtypes = [
     ctypes.POINTER(MoveResult)    # result struct
 ]
 
+MAX_SEQS = 128  # MoveList capacity in engine.cpp
+MAX_STEPS = 12  # Step slots per sequence
+
+# Move generation entry points (missing from engine.dll builds that predate them)
+NATIVE_MOVEGEN = hasattr(cpp_lib, "gen_legal_moves") and hasattr(cpp_lib, "find_captures_from")
+if NATIVE_MOVEGEN:
+    cpp_lib.gen_legal_moves.argtypes = [
+        ctypes.POINTER(ctypes.c_int), # flat board
+        ctypes.c_int,                 # player
+        ctypes.POINTER(Step),         # out steps (MAX_STEPS per sequence)
+        ctypes.POINTER(ctypes.c_int), # out sequence lengths
+        ctypes.c_int                  # max sequences
+    ]
+    cpp_lib.gen_legal_moves.restype = ctypes.c_int
+    cpp_lib.find_captures_from.argtypes = [
+        ctypes.POINTER(ctypes.c_int), # flat board
+        ctypes.c_int, ctypes.c_int,   # r, c
+        ctypes.c_int,                 # piece
+        ctypes.POINTER(Step),         # out steps (MAX_STEPS per sequence)
+        ctypes.POINTER(ctypes.c_int), # out sequence lengths
+        ctypes.c_int                  # max sequences
+    ]
+    cpp_lib.find_captures_from.restype = ctypes.c_int
+
+# Interrupts a running get_best_move (missing from older engine.dll builds)
+if hasattr(cpp_lib, "abort_search"):
+    cpp_lib.abort_search.argtypes = []
+
+# Optional jitted fallback move generator, only worth importing when the DLL has no movegen
+# (search workers re-import this module, so this also keeps numba out of them)
+numba = None
+if not NATIVE_MOVEGEN:
+    try:
+        import numpy as np
+        import numba
+    except ImportError:
+        numba = None
+
+# Root-split search in worker processes (needs search_move as well as gen_legal_moves).
+# The GUI uses it on multi-core machines; otherwise find_best_move searches in-process.
+PARALLEL_SEARCH = NATIVE_MOVEGEN and hasattr(cpp_lib, "search_move") and hasattr(cpp_lib, "init_tt")
+if PARALLEL_SEARCH:
+    cpp_lib.init_tt.argtypes = [ctypes.c_int]
+    cpp_lib.search_move.argtypes = [
+        ctypes.POINTER(ctypes.c_int), # flat board
+        ctypes.c_int,                 # player
+        ctypes.POINTER(Step),         # root move steps
+        ctypes.c_int,                 # step count
+        ctypes.c_int,                 # depth
+        ctypes.c_int, ctypes.c_int,   # alpha, beta
+        ctypes.c_double,              # time limit
+        ctypes.POINTER(SubtreeResult) # result struct
+    ]
+
 MAX_TIME = 5.0       # Thinking time in seconds
 MAX_DEPTH_LIMIT = 64 # Maximum depth
 MATE_SCORE = 1000000
+INF = 1000000         # INF in engine.cpp
+ENGINE_MATE = 900000  # MATE in engine.cpp
+TT_ENTRIES = 1 << 24  # default tt_size in engine.cpp, split between search workers
+GHOST = 7             # jumped-piece marker in engine.cpp
 
 EMPTY = 0
 BLACK_MAN = 1
 WHITE_MAN = 2
 BLACK_KING = 3
 WHITE_KING = 4
+# Side of each piece code, as that side's man code (0 for an empty square)
+PIECE_SIDE = (EMPTY, BLACK_MAN, WHITE_MAN, BLACK_MAN, WHITE_MAN)
+
+DIRS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+
+# Per-square tables, indexed by square number (r*8 + c)
+SQ_RC = tuple(divmod(sq, 8) for sq in range(64))
+_man_moves_black, _man_moves_white, _man_captures, _king_rays = [], [], [], []
+for _r, _c in SQ_RC:
+    _rays = []
+    for _dr, _dc in DIRS:
+        _nr, _nc = _r + _dr, _c + _dc
+        _ray = []
+        while 0 <= _nr < 8 and 0 <= _nc < 8:
+            _ray.append(_nr*8 + _nc)
+            _nr += _dr; _nc += _dc
+        _rays.append(tuple(_ray))
+    _man_moves_black.append(tuple(ray[0] for (dr, _), ray in zip(DIRS, _rays) if dr > 0 and ray))
+    _man_moves_white.append(tuple(ray[0] for (dr, _), ray in zip(DIRS, _rays) if dr < 0 and ray))
+    _man_captures.append(tuple((ray[0], ray[1]) for ray in _rays if len(ray) >= 2))
+    _king_rays.append(tuple(_rays))
+
+MAN_MOVES_BLACK = tuple(_man_moves_black)  # forward steps, bottom-left before bottom-right
+MAN_MOVES_WHITE = tuple(_man_moves_white)
+MAN_CAPTURES = tuple(_man_captures)        # (jumped square, landing square) per direction
+KING_RAYS = tuple(_king_rays)              # KING_RAYS[sq][dir] runs outward to the edge
+
+# A step is packed into one int, (r1<<18)|(c1<<12)|(r2<<6)|c2; a move is a tuple of steps.
+# step >> 12 is then the source and step & 0xFFF the target, both as (r<<6)|c.
+STEP_SRC = tuple(r << 18 | c << 12 for r, c in SQ_RC)
+STEP_DST = tuple(r << 6 | c for r, c in SQ_RC)
+
+# Zobrist keys for the GUI's own position hash: ZOBRIST[sq][piece code], plus white to move
+_zrng = random.Random(0x5741594C)
+ZOBRIST = tuple(tuple(_zrng.getrandbits(64) for _ in range(5)) for _ in range(64))
+ZOBRIST_WHITE = _zrng.getrandbits(64)
+
+def pack_step(r1, c1, r2, c2):
+    return (r1 << 18) | (c1 << 12) | (r2 << 6) | c2
+
+def unpack_step(step):
+    return step >> 18, step >> 12 & 0x3F, step >> 6 & 0x3F, step & 0x3F
+
+SQUARE_COLORS = tuple("#F0D9B5" if (r+c)%2 == 0 else "#B58863" for r, c in SQ_RC)
+# piece code -> (fill, outline, outline width, king mark colour or None)
+PIECE_STYLES = {
+    BLACK_MAN: ("black", "white", 1, None),
+    WHITE_MAN: ("red", "black", 1, None),
+    BLACK_KING: ("black", "gold", 3, "white"),
+    WHITE_KING: ("red", "gold", 3, "black"),
+}
+
+def read_sequences(steps, lens, n):
+    seqs = []
+    for i in range(n):
+        base = i * MAX_STEPS
+        seqs.append(tuple(pack_step(s.r1, s.c1, s.r2, s.c2) for s in steps[base:base + lens[i]]))
+    return seqs
+
+def format_score(score):
+    if score > MATE_SCORE - 1000: return f"MATE +{MATE_SCORE - score}"
+    if score < -MATE_SCORE + 1000: return f"MATE -{MATE_SCORE + score}"
+    return str(score)
+
+# Search worker side: every process of the pool holds its own engine.dll and TT
+def _init_search_worker(tt_entries):
+    cpp_lib.init_tt(tt_entries)
+
+def _search_subtree(board, player, seq, depth, alpha, beta, deadline):
+    # deadline is absolute: a task may sit in the queue before a worker picks it up
+    time_left = deadline - time.time()
+    if time_left <= 0: return -INF, 0, 0
+    result = SubtreeResult()
+    c_board = (ctypes.c_int * 64).from_buffer_copy(board)
+    c_steps = (Step * len(seq))(*[Step(*unpack_step(s)) for s in seq])
+    cpp_lib.search_move(c_board, player, c_steps, len(seq), depth, alpha, beta, time_left, ctypes.byref(result))
+    return result.score, result.completed, result.nodes
+
+# Python fallback capture finders, one per piece shape. visited is a bitmask of squares
+# already jumped in the current chain; tables are bound as defaults so lookups stay local.
+ENEMY_CODES = ((WHITE_MAN, WHITE_KING), (BLACK_MAN, BLACK_KING)) # indexed by is_white
+
+def _find_captures_man(board, sq, is_white, visited, _caps=MAN_CAPTURES, _src=STEP_SRC, _dst=STEP_DST, _enm=ENEMY_CODES):
+    res = []
+    src = _src[sq]
+    enemies = _enm[is_white]
+    for mid, land in _caps[sq]:
+        if board[mid] in enemies and board[land] == 0 and not visited >> mid & 1:
+            res.append((src | _dst[land],))
+    return res
+
+def _find_captures_king(board, sq, is_white, visited, _rays=KING_RAYS, _src=STEP_SRC, _dst=STEP_DST, _enm=ENEMY_CODES):
+    res = []
+    _append = res.append
+    src = _src[sq]
+    enemies = _enm[is_white]
+    for ray in _rays[sq]:
+        for i, mid in enumerate(ray):
+            val = board[mid]
+            if val == 0: continue
+            if val in enemies and not visited >> mid & 1:
+                # Enemy found
+                for land in ray[i+1:]:
+                    if board[land] != 0: break
+                    _append((src | _dst[land],))
+            break
+    return res
+
+# indexed by piece code
+CAPTURE_FNS = (None, _find_captures_man, _find_captures_man, _find_captures_king, _find_captures_king)
+
+if numba is not None:
+    # The same tables as int8 arrays for the jitted generator, -1 where a slot is unused
+    NB_MAN_CAPTURES = np.full((64, 4, 2), -1, np.int8)
+    NB_KING_RAYS = np.full((64, 4, 7), -1, np.int8)
+    NB_MAN_MOVES = np.full((2, 64, 2), -1, np.int8) # [is_white][sq]
+    for _sq in range(64):
+        for _i, _cap in enumerate(MAN_CAPTURES[_sq]): NB_MAN_CAPTURES[_sq, _i] = _cap
+        for _d, _ray in enumerate(KING_RAYS[_sq]): NB_KING_RAYS[_sq, _d, :len(_ray)] = _ray
+        NB_MAN_MOVES[0, _sq, :len(MAN_MOVES_BLACK[_sq])] = MAN_MOVES_BLACK[_sq]
+        NB_MAN_MOVES[1, _sq, :len(MAN_MOVES_WHITE[_sq])] = MAN_MOVES_WHITE[_sq]
+    NB_MAX_CAPTURES = 12 # single-hop captures from one square never exceed this on 8x8
+
+    @numba.njit(cache=True)
+    def _nb_push(out, n, sq, dst):
+        if n < out.shape[0]:
+            out[n, 0] = sq // 8; out[n, 1] = sq % 8; out[n, 2] = dst // 8; out[n, 3] = dst % 8
+            n += 1
+        return n
+
+    @numba.njit(cache=True)
+    def _nb_captures_into(board, sq, piece, visited, out, n):
+        is_white = piece == 2 or piece == 4
+        e1 = 1 if is_white else 2
+        e2 = e1 + 2
+        if piece == 3 or piece == 4:
+            for d in range(4):
+                for i in range(7):
+                    mid = NB_KING_RAYS[sq, d, i]
+                    if mid < 0: break
+                    val = board[mid]
+                    if val == 0: continue
+                    if (val == e1 or val == e2) and (visited >> np.uint64(mid)) & np.uint64(1) == 0:
+                        for j in range(i + 1, 7):
+                            land = NB_KING_RAYS[sq, d, j]
+                            if land < 0 or board[land] != 0: break
+                            n = _nb_push(out, n, sq, land)
+                    break
+        else:
+            for i in range(4):
+                mid = NB_MAN_CAPTURES[sq, i, 0]
+                if mid < 0: break
+                land = NB_MAN_CAPTURES[sq, i, 1]
+                val = board[mid]
+                if (val == e1 or val == e2) and board[land] == 0 and (visited >> np.uint64(mid)) & np.uint64(1) == 0:
+                    n = _nb_push(out, n, sq, land)
+        return n
+
+    @numba.njit(cache=True)
+    def nb_find_captures(board, sq, piece, visited_mask):
+        out = np.empty((NB_MAX_CAPTURES, 4), np.int16)
+        return out, _nb_captures_into(board, sq, piece, visited_mask, out, 0)
+
+    @numba.njit(cache=True)
+    def nb_get_legal_moves(board, player, max_seqs):
+        out = np.empty((max_seqs, 4), np.int16)
+        is_white = player == 2 or player == 4
+        man = 2 if is_white else 1
+        king = man + 2
+        n = 0
+        for sq in range(64):
+            p = board[sq]
+            if p == man or p == king:
+                n = _nb_captures_into(board, sq, p, np.uint64(0), out, n)
+        if n > 0:
+            return out, n, True
+        w = 1 if is_white else 0
+        for sq in range(64):
+            p = board[sq]
+            if p == king:
+                for d in range(4):
+                    for i in range(7):
+                        dst = NB_KING_RAYS[sq, d, i]
+                        if dst < 0 or board[dst] != 0: break
+                        n = _nb_push(out, n, sq, dst)
+            elif p == man:
+                for k in range(2):
+                    dst = NB_MAN_MOVES[w, sq, k]
+                    if dst >= 0 and board[dst] == 0:
+                        n = _nb_push(out, n, sq, dst)
+        return out, n, False
 
 class GrandmasterEngine:
     def __init__(self):
         self.nodes = 0
-
-    def find_captures(self, grid, r, c, piece, visited):
-        res = []
-        is_white = (piece == 2 or piece == 4)
-        is_king = (piece == 3 or piece == 4)
-        enemy_man = 1 if is_white else 2
-        enemy_king = 3 if is_white else 4
-        dirs = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-        
-        for dr, dc in dirs:
-            if not is_king:
-                nr, nc = r + dr, c + dc
-                jr, jc = r + 2*dr, c + 2*dc
-                if 0 <= jr < 8 and 0 <= jc < 8:
-                    mid = grid[nr][nc]
-                    if (mid == enemy_man or mid == enemy_king) and grid[jr][jc] == 0:
-                        if (nr, nc) not in visited:
-                            step = [r, c, jr, jc]
-                            res.append([step]) 
-            else:
-                # King logic
-                k = 1
-                while True:
-                    nr, nc = r + k*dr, c + k*dc
-                    if not (0 <= nr < 8 and 0 <= nc < 8): break
-                    val = grid[nr][nc]
-                    if val == 0: k+=1; continue
-                    if val == enemy_man or val == enemy_king:
-                        # Enemy found
-                        land_k = 1
-                        while True:
-                            jr, jc = nr + land_k*dr, nc + land_k*dc
-                            if not (0 <= jr < 8 and 0 <= jc < 8): break
-                            if grid[jr][jc] != 0: break
-                            if (nr, nc) not in visited:
-                                step = [r, c, jr, jc]
-                                res.append([step])
-                            land_k += 1
-                        break
-                    else: break
-        return res
-
-    def get_legal_moves(self, grid, player):
+        # Buffers shared by every native movegen call
+        self._board_buf = (ctypes.c_int * 64)()
+        self._steps_buf = (Step * (MAX_SEQS * MAX_STEPS))()
+        self._lens_buf = (ctypes.c_int * MAX_SEQS)()
+        # engine.cpp keeps its search state (clock, stop flag, TT, killers) in globals, so
+        # in-process searches take turns under this lock and can share one result slot
+        self._search_lock = threading.Lock()
+        self._result_buf = _engine.SearchSlot() if _engine is not None else MoveResult()
+        if _engine is not None: self._abort = _engine.abort_search
+        else: self._abort = getattr(cpp_lib, "abort_search", None) # None: old DLL, runs to MAX_TIME
+
+    def _load_board(self, board):
+        self._board_buf[:] = board
+        return self._board_buf
+
+    # Boards are flat 64-cell sequences of piece codes, indexed r*8 + c
+    def find_captures(self, board, r, c, piece, visited):
+        if not NATIVE_MOVEGEN:
+            if numba is not None:
+                out, n = nb_find_captures(np.frombuffer(board, np.int8), r*8 + c, piece, np.uint64(visited))
+                return [(pack_step(*s),) for s in out[:n].tolist()]
+            return self._find_captures_py(board, r, c, piece, visited)
+        # The C++ generator follows whole chains. Squares jumped earlier in this chain go in as
+        # GHOST, which it won't cross, land on or jump again, just as in find_captures_recursive.
+        buf = self._load_board(board)
+        while visited:
+            low = visited & -visited
+            buf[low.bit_length() - 1] = GHOST
+            visited ^= low
+        n = cpp_lib.find_captures_from(buf, r, c, piece, self._steps_buf, self._lens_buf, MAX_SEQS)
+        return read_sequences(self._steps_buf, self._lens_buf, n)
+
+    def get_legal_moves(self, board, player):
+        if not NATIVE_MOVEGEN:
+            if numba is not None:
+                out, n, is_capture = nb_get_legal_moves(np.frombuffer(board, np.int8), player, MAX_SEQS)
+                return [(pack_step(*s),) for s in out[:n].tolist()], is_capture
+            return self._get_legal_moves_py(board, player)
+        n = cpp_lib.gen_legal_moves(self._load_board(board), player,
+                                    self._steps_buf, self._lens_buf, MAX_SEQS)
+        seqs = read_sequences(self._steps_buf, self._lens_buf, n)
+        if not seqs: return seqs, False
+        # A first step is a capture iff it passes over an occupied square
+        r1, c1, r2, c2 = unpack_step(seqs[0][0])
+        dr = 1 if r2 > r1 else -1
+        dc = 1 if c2 > c1 else -1
+        is_capture = len(seqs[0]) > 1 or any(board[(r1 + k*dr)*8 + c1 + k*dc] for k in range(1, abs(r2 - r1)))
+        return seqs, is_capture
+
+    def _find_captures_py(self, board, r, c, piece, visited):
+        return CAPTURE_FNS[piece](board, r*8 + c, piece == WHITE_MAN or piece == WHITE_KING, visited)
+
+    def _get_legal_moves_py(self, board, player):
         moves = []
         captures = []
-        
+
         is_white = (player == 2 or player == 4)
         man = 2 if is_white else 1
         king = 4 if is_white else 3
-        
+        mine = [sq for sq, p in enumerate(board) if p == man or p == king]
+        # Hot names bound once as locals
+        capture_fns = CAPTURE_FNS
+        _caps_extend = captures.extend
+
         # 1. Find captures
-        for r in range(8):
-            for c in range(8):
-                if grid[r][c] in (man, king):
-                    caps = self.find_captures(grid, r, c, grid[r][c], set())
-                    for c_seq in caps:
-                        captures.append(c_seq)
-        
+        for sq in mine:
+            _caps_extend(capture_fns[board[sq]](board, sq, is_white, 0))
+
         if captures:
             # Capture compulsion (only captures are returned)
             return captures, True
 
-        for r in range(8):
-            for c in range(8):
-                p = grid[r][c]
-                if p not in (man, king): continue
-                
-                is_k = (p == 3 or p == 4)
-                dirs = [(-1,-1),(-1,1),(1,-1),(1,1)] if is_k else (
-                    [(-1,-1),(-1,1)] if is_white else [(1,-1),(1,1)]
-                )
-                for dr, dc in dirs:
-                    nr, nc = r + dr, c + dc
-                    if is_k:
-                        while 0 <= nr < 8 and 0 <= nc < 8:
-                            if grid[nr][nc] == 0:
-                                moves.append([[r, c, nr, nc]])
-                                nr += dr; nc += dc
-                            else: break
-                    else:
-                        if 0 <= nr < 8 and 0 <= nc < 8 and grid[nr][nc] == 0:
-                            moves.append([[r, c, nr, nc]])           
+        man_moves = MAN_MOVES_WHITE if is_white else MAN_MOVES_BLACK
+        step_src, step_dst, king_rays = STEP_SRC, STEP_DST, KING_RAYS
+        _moves_append = moves.append
+        for sq in mine:
+            src = step_src[sq]
+            if board[sq] == king:
+                for ray in king_rays[sq]:
+                    for dst in ray:
+                        if board[dst] != 0: break
+                        _moves_append((src | step_dst[dst],))
+            else:
+                for dst in man_moves[sq]:
+                    if board[dst] == 0:
+                        _moves_append((src | step_dst[dst],))
         return moves, False
 
-    def find_best_move(self, grid_list, player, callback=None, logger=None):
-        flat_board = [0] * 64
-        for r in range(8):
-            for c in range(8):
-                flat_board[r*8 + c] = grid_list[r][c]
-        
-        c_board = (ctypes.c_int * 64)(*flat_board)
-        result = MoveResult()
-        
+    def find_best_move(self, c_board, player, callback=None, logger=None, stop=None):
+        # stop: optional threading.Event; once set the search is aborted and returns no move
         if logger:
             logger.info(f"START SEARCH for Player {player}")
 
-        cpp_lib.get_best_move(c_board, player, MAX_TIME, MAX_DEPTH_LIMIT, ctypes.byref(result))
+        with self._search_lock:
+            if stop is not None and stop.is_set(): return None, -999999, 0 # superseded while queued
+            result = self._result_buf
+            if _engine is not None: result.clear()
+            else: result.count = result.depth_live = result.score_live = 0
+            # No Python callback goes into C: a poller thread reads the progress slot instead
+            done = threading.Event()
+            poller = None
+            if callback or stop is not None:
+                poller = threading.Thread(target=self.progress_poller, args=(result, done, callback, stop), daemon=True)
+                poller.start()
+            try:
+                if _engine is not None:
+                    final_move, score, depth, nodes = _engine.best_move(c_board, player, MAX_TIME, MAX_DEPTH_LIMIT, result)
+                else:
+                    cpp_lib.get_best_move(c_board, player, MAX_TIME, MAX_DEPTH_LIMIT, ctypes.byref(result))
+                    final_move = tuple(pack_step(s.r1, s.c1, s.r2, s.c2) for s in result.steps[:result.count])
+                    score, depth, nodes = result.score, result.depth, result.nodes
+            finally:
+                done.set()
+                # The poller reads the slot too, so it must be gone before the next search clears it
+                if poller is not None: poller.join()
         
-        if result.count == 0:
-            return None, -999999
-
-        final_move = []
-        for i in range(result.count):
-            s = result.steps[i]
-            final_move.append([s.r1, s.c1, s.r2, s.c2])
+        if not final_move or (stop is not None and stop.is_set()):
+            return None, -999999, 0
             
-        score_txt = str(result.score)
-        if result.score > MATE_SCORE - 1000: score_txt = f"MATE +{MATE_SCORE - result.score}"
-        elif result.score < -MATE_SCORE + 1000: score_txt = f"MATE -{MATE_SCORE + result.score}"
-
-        log_msg = f"END: Depth={result.depth} Score={score_txt} Nodes={result.nodes}"
+        score_txt = format_score(score)
+        log_msg = f"END: Depth={depth} Score={score_txt} Nodes={nodes}"
         if logger: logger.info(log_msg)
         print(log_msg)
         
         if callback:
-            callback(result.depth, score_txt)
-
-        return final_move, result.score, result.depth
+            callback(depth, score_txt)
+
+        return final_move, score, depth
+
+    def progress_poller(self, result, done, callback, stop=None):
+        last_depth = 0
+        while not done.wait(0.05):
+            if stop is not None and stop.is_set():
+                # Repeated until the search returns: a call before the engine resets its flag is lost
+                if self._abort is not None: self._abort()
+                continue
+            if not callback: continue
+            depth = result.depth_live
+            if depth != last_depth:
+                last_depth = depth
+                callback(depth, format_score(result.score_live))
+
+    def find_best_move_parallel(self, c_board, player, update_callback=None, logger_ref=None, pool=None, stop=None):
+        # stop: optional threading.Event, set when the result is no longer wanted
+        if pool is None:
+            return self.find_best_move(c_board, player, update_callback, logger_ref, stop)
+        if logger_ref:
+            logger_ref.info(f"START PARALLEL SEARCH for Player {player}")
+
+        # Own buffers: the Tk thread keeps using the shared ones for clicks
+        steps, lens = (Step * (MAX_SEQS * MAX_STEPS))(), (ctypes.c_int * MAX_SEQS)()
+        roots = read_sequences(steps, lens, cpp_lib.gen_legal_moves(c_board, player, steps, lens, MAX_SEQS))
+        if not roots:
+            return None, -999999, 0
+        if len(roots) == 1:
+            return roots[0], 0, 1
+
+        board = bytes(c_board)
+        deadline = time.time() + MAX_TIME
+        best_move, best_score, reached, nodes = roots[0], -INF, 0, 0
+        for d in range(1, MAX_DEPTH_LIMIT + 1):
+            # Young brothers wait: the eldest move sets alpha, then its brothers run in parallel
+            if time.time() >= deadline: break
+            if stop is not None and stop.is_set(): return None, -999999, 0
+            score, done, n = pool.submit(_search_subtree, board, player, roots[0], d, -INF, INF, deadline).result()
+            nodes += n
+            if not done: break
+
+            # With beta = INF a brother scoring above alpha is exact, the rest fail low
+            scores = [score] + [-INF] * (len(roots) - 1)
+            futures = {}
+            for i in range(1, len(roots)):
+                if stop is not None and stop.is_set():
+                    for f in futures: f.cancel()
+                    return None, -999999, 0
+                futures[pool.submit(_search_subtree, board, player, roots[i], d, score, INF, deadline)] = i
+            for fut in as_completed(futures):
+                if stop is not None and stop.is_set():
+                    for f in futures: f.cancel()
+                    return None, -999999, 0
+                s, done, n = fut.result()
+                nodes += n
+                if not done:
+                    # Out of time: this depth is lost, don't let queued brothers run
+                    for f in futures: f.cancel()
+                    break
+                scores[futures[fut]] = s
+            if not done: break
+
+            best = max(range(len(roots)), key=scores.__getitem__)
+            best_move, best_score, reached = roots[best], scores[best], d
+            roots.insert(0, roots.pop(best)) # best move goes first at the next depth
+            if update_callback:
+                update_callback(d, format_score(best_score))
+            if best_score > ENGINE_MATE - 5000: break
+
+        log_msg = f"END: Depth={reached} Score={format_score(best_score)} Nodes={nodes}"
+        if logger_ref: logger_ref.info(log_msg)
+        print(log_msg)
 
-    def find_best_move_parallel(self, grid, player, update_callback=None, logger_ref=None):
-        return self.find_best_move(grid, player, update_callback, logger_ref)
+        return best_move, best_score, reached
 
 def setup_logging():
     root_logger = logging.getLogger()
@@ -202,40 +544,60 @@ class CheckersGame:
         self.gui_queue = queue.Queue()
 
         self.SQ = 70
-        self.board = [[None]*8 for _ in range(8)]
-        self.current_player = "black" 
+        self.board_flat = bytearray(64) # piece codes, indexed r*8 + c
+        self.set_player("black")
         self.selected = None
         self.valid_moves = []
         self.in_chain = False 
+        self._chain_jumped = 0 # bitmask of squares captured so far in the current chain
         self.game_over = False
         self.ai_thinking = False
         self.hint_move = None      
         self.turn_counter = 0  
+        self._legal_cache = None     # get_legal_moves result for _legal_cache_key
+        self._legal_cache_key = None
+        self.zkey = 0   # Zobrist key of board_flat + side to move, kept up to date by execute_move/end_turn
+        self._tt = {}   # zkey -> (move, score, depth) of finished hint searches
         
         self.engine = GrandmasterEngine()
+        self._c_board = (ctypes.c_int * 64)() # search input, filled by board_to_flat
+        self._pool = None # search worker processes
+        self._search_stop = None # threading.Event of the running hint search
         
         self.init_board()
         self.build_ui()
+        self.start_search_pool()
         self.root.after(100, self.process_queue)
         self.root.after(200, self.reset_game_logic)
 
     def on_closing(self):
         self.is_running = False
         self.game_over = True
+        self.stop_hint_search()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
         try: self.root.destroy()
         except: pass
 
     def process_queue(self):
         if not self.is_running: return
+        last_depth = None # only the newest depth_update of a tick reaches the label
         try:
             while True:
                 msg = self.gui_queue.get_nowait()
                 if msg['type'] == 'hint_result':
+                    last_depth = None
+                    # Stopped searches never post, so this is a finished one; depth 0 means the
+                    # deadline hit before depth 1 and the move is unsearched, so don't keep it
+                    if msg['move'] and msg['depth'] >= 1: self._tt[msg['zkey']] = (msg['move'], msg.get('score', 0), msg['depth'])
                     self.display_hint(msg['move'], msg['turn'], msg['depth'], msg.get('score', 0))
                 elif msg['type'] == 'depth_update':
-                    self.depth_info.config(text=f"D: {msg['depth']} | O: {msg['score']}")
+                    last_depth = msg
         except queue.Empty: pass
         finally:
+            if last_depth and self.is_running:
+                try: self.depth_info.config(text=f"D: {last_depth['depth']} | O: {last_depth['score']}")
+                except: pass
             if self.is_running: self.root.after(50, self.process_queue)
 
     def display_hint(self, move, turn_id, depth, score):
@@ -262,54 +624,78 @@ class CheckersGame:
         self.canvas = tk.Canvas(self.root, width=8*self.SQ, height=8*self.SQ, bg="#F0D9B5")
         self.canvas.pack(side=tk.LEFT)
         self.canvas.bind("<Button-1>", self.on_click)
+        self.create_board_items()
+
+    def create_board_items(self):
+        # Every square gets its items once; draw() only reconfigures them.
+        # Creation order gives the stacking: squares, move dots, pieces, king marks.
+        SQ = self.SQ
+        self._sq_ids, self._dot_ids, self._piece_ids, self._king_ids = [], [], [], []
+        for r, c in SQ_RC:
+            self._sq_ids.append(self.canvas.create_rectangle(c*SQ, r*SQ, (c+1)*SQ, (r+1)*SQ,
+                                                             fill=SQUARE_COLORS[r*8 + c], outline="", tags="square"))
+        for r, c in SQ_RC:
+            cx, cy = c*SQ + SQ//2, r*SQ + SQ//2
+            self._dot_ids.append(self.canvas.create_oval(cx-10, cy-10, cx+10, cy+10, fill="lightgreen", outline="green",
+                                                         width=2, state="hidden", tags="dot"))
+        for r, c in SQ_RC:
+            self._piece_ids.append(self.canvas.create_oval(c*SQ+10, r*SQ+10, c*SQ+SQ-10, r*SQ+SQ-10,
+                                                           state="hidden", tags="piece"))
+        for r, c in SQ_RC:
+            self._king_ids.append(self.canvas.create_text(c*SQ + SQ/2, r*SQ + SQ/2, text="K", font=("Arial", 20, "bold"),
+                                                          state="hidden", tags="piece"))
+        self._sq_fill = list(SQUARE_COLORS)
+        self._dot_shown = [False] * 64
+        self._piece_drawn = [EMPTY] * 64
+        self._drawn_hint = None
 
     def init_board(self):
-        self.board = [[None]*8 for _ in range(8)]
+        self.board_flat = bytearray(64)
         for r in range(8):
             for c in range(8):
                 if (r+c)%2 == 1:
-                    if r < 3: self.board[r][c] = {'c': 'black', 'k': False}
-                    elif r > 4: self.board[r][c] = {'c': 'white', 'k': False}
+                    if r < 3: self.board_flat[r*8 + c] = BLACK_MAN
+                    elif r > 4: self.board_flat[r*8 + c] = WHITE_MAN
 
     def draw(self):
         if not self.is_running: return
         try:
-            self.canvas.delete("all")
-            for r in range(8):
-                for c in range(8):
-                    color = "#F0D9B5" if (r+c)%2==0 else "#B58863"
-                    x1, y1, x2, y2 = c*self.SQ, r*self.SQ, (c+1)*self.SQ, (r+1)*self.SQ
-                    self.canvas.create_rectangle(x1, y1, x2, y2, fill=color, outline="")
-                    if self.selected and (r,c) == self.selected:
-                        self.canvas.create_rectangle(x1, y1, x2, y2, fill="#646F40", outline="")
-            
-            if self.hint_move:
-                steps = self.hint_move
-                if not isinstance(steps[0], list): steps = [steps]
-                
-                for step in steps:
-                    if len(step) >= 4:
-                        x1, y1 = step[1]*self.SQ + self.SQ//2, step[0]*self.SQ + self.SQ//2
-                        x2, y2 = step[3]*self.SQ + self.SQ//2, step[2]*self.SQ + self.SQ//2
-                        self.canvas.create_line(x1, y1, x2, y2, fill="blue", width=4, arrow=tk.LAST)
-                        self.canvas.create_oval(x1-5, y1-5, x1+5, y1+5, fill="blue", outline="")
-
-            for m in self.valid_moves:
-                step = m[0]
-                if len(step) >= 4:
-                    cx, cy = step[3]*self.SQ + self.SQ//2, step[2]*self.SQ + self.SQ//2
-                    self.canvas.create_oval(cx-10, cy-10, cx+10, cy+10, fill="lightgreen", outline="green", width=2)
-
-            for r in range(8):
-                for c in range(8):
-                    p = self.board[r][c]
+            canvas = self.canvas
+            sel = self.selected[0]*8 + self.selected[1] if self.selected else -1
+            targets = {(m[0] >> 6 & 0x3F)*8 + (m[0] & 0x3F) for m in self.valid_moves}
+            # Only items whose look changed since the last draw are reconfigured
+            for sq in range(64):
+                fill = "#646F40" if sq == sel else SQUARE_COLORS[sq]
+                if fill != self._sq_fill[sq]:
+                    canvas.itemconfig(self._sq_ids[sq], fill=fill)
+                    self._sq_fill[sq] = fill
+                dot = sq in targets
+                if dot != self._dot_shown[sq]:
+                    canvas.itemconfigure(self._dot_ids[sq], state="normal" if dot else "hidden")
+                    self._dot_shown[sq] = dot
+                p = self.board_flat[sq]
+                if p != self._piece_drawn[sq]:
                     if p:
-                        x1, y1, x2, y2 = c*self.SQ+10, r*self.SQ+10, c*self.SQ+self.SQ-10, r*self.SQ+self.SQ-10
-                        f_c = "red" if p['c'] == 'white' else "black"
-                        o_c = "gold" if p['k'] else ("white" if f_c=="black" else "black")
-                        self.canvas.create_oval(x1, y1, x2, y2, fill=f_c, outline=o_c, width=3 if p['k'] else 1)
-                        if p['k']: self.canvas.create_text((x1+x2)/2, (y1+y2)/2, text="K", fill="white" if f_c=="black" else "black", font=("Arial", 20, "bold"))
-            self.canvas.update_idletasks()
+                        f_c, o_c, width, t_c = PIECE_STYLES[p]
+                        canvas.itemconfigure(self._piece_ids[sq], state="normal", fill=f_c, outline=o_c, width=width)
+                        canvas.itemconfigure(self._king_ids[sq], state="normal" if t_c else "hidden", fill=t_c)
+                    else:
+                        canvas.itemconfigure(self._piece_ids[sq], state="hidden")
+                        canvas.itemconfigure(self._king_ids[sq], state="hidden")
+                    self._piece_drawn[sq] = p
+
+            if self.hint_move is not self._drawn_hint:
+                canvas.delete("hint")
+                if self.hint_move:
+                    for step in self.hint_move:
+                        r1, c1, r2, c2 = unpack_step(step)
+                        x1, y1 = c1*self.SQ + self.SQ//2, r1*self.SQ + self.SQ//2
+                        x2, y2 = c2*self.SQ + self.SQ//2, r2*self.SQ + self.SQ//2
+                        canvas.create_line(x1, y1, x2, y2, fill="blue", width=4, arrow=tk.LAST, tags="hint")
+                        canvas.create_oval(x1-5, y1-5, x1+5, y1+5, fill="blue", outline="", tags="hint")
+                    # Arrows sit above the squares but under move dots and pieces
+                    canvas.tag_lower("hint", "dot")
+                self._drawn_hint = self.hint_move
         except Exception as e:
             print(f"Draw error: {e}")
 
@@ -317,28 +703,25 @@ class CheckersGame:
         if self.game_over or not self.is_running: return
         r, c = e.y // self.SQ, e.x // self.SQ
         if not (0<=r<8 and 0<=c<8): return
-        p = self.board[r][c]
-        
-        def get_dest(m): 
-            return m[0][2], m[0][3]
+        p = self.board_flat[r*8 + c]
+        here = r << 6 | c # packed square, compared against step >> 12 and step & 0xFFF
 
         if self.in_chain:
             for m in self.valid_moves:
-                dr, dc = get_dest(m)
-                if dr == r and dc == c: 
+                if m[0] & 0xFFF == here: 
                     self.execute_move(m) 
                     return
             return
             
-        if p and p['c'] == self.current_player:
-            grid = self.board_to_int_grid(self.board)
-            pl_int = BLACK_MAN if self.current_player == 'black' else WHITE_MAN
-            legal_moves_seqs, _ = self.engine.get_legal_moves(grid, pl_int)
+        if p and PIECE_SIDE[p] == self._ctm_man:
+            # Selecting another piece doesn't change the position, so reuse its moves
+            key = (bytes(self.board_flat), self._ctm_man, self.in_chain)
+            if key != self._legal_cache_key:
+                self._legal_cache = self.engine.get_legal_moves(self.board_flat, self._ctm_man)
+                self._legal_cache_key = key
+            legal_moves_seqs, _ = self._legal_cache
             
-            my_moves = []
-            for seq in legal_moves_seqs:
-                if seq[0][0] == r and seq[0][1] == c:
-                    my_moves.append(seq)
+            my_moves = [seq for seq in legal_moves_seqs if seq[0] >> 12 == here]
             
             if my_moves:
                 self.selected = (r, c)
@@ -350,38 +733,43 @@ class CheckersGame:
             
         elif not p and self.selected:
             for m in self.valid_moves:
-                dr, dc = get_dest(m)
-                if dr == r and dc == c: 
+                if m[0] & 0xFFF == here: 
                     self.execute_move(m) 
                     return
 
     def execute_move(self, move_seq):
-        step = move_seq[0]
-        start_r, start_c = step[0], step[1]
-        
-        p = self.board[start_r][start_c]
-        self.board[start_r][start_c] = None
+        start_r, start_c, tr, tc = unpack_step(move_seq[0])
+        # What is left of every offered sequence that starts with this step
+        rest = [m[1:] for m in self.valid_moves if m[0] == move_seq[0] and len(m) > 1]
+        self._legal_cache_key = None
         
-        tr, tc = step[2], step[3]
+        board = self.board_flat
+        src, dst = start_r*8 + start_c, tr*8 + tc
+        p = board[src]
+        board[src] = EMPTY
+        zkey = self.zkey ^ ZOBRIST[src][p] ^ ZOBRIST[dst][p]
         
         dr = 1 if tr > start_r else -1
         dc = 1 if tc > start_c else -1
         cr, cc = start_r + dr, start_c + dc
         captured = False
         while cr != tr:
-            if self.board[cr][cc]: 
-                self.board[cr][cc] = None
+            if board[cr*8 + cc]: 
+                zkey ^= ZOBRIST[cr*8 + cc][board[cr*8 + cc]]
+                board[cr*8 + cc] = EMPTY
+                self._chain_jumped |= 1 << (cr*8 + cc)
                 captured = True
             cr += dr; cc += dc
             
-        self.board[tr][tc] = p
+        board[dst] = p
+        self.zkey = zkey
         
         # Chain jump logic
         if captured:
-            # Check for further captures from the new position
-            grid = self.board_to_int_grid(self.board)
-            p_val = grid[tr][tc]
-            found = self.engine.find_captures(grid, tr, tc, p_val, set())
+            # Native sequences are whole majority-rule chains, so keep following the chosen ones;
+            # the fallback generators only give single hops, so look for the next one
+            if NATIVE_MOVEGEN: found = rest
+            else: found = self.engine.find_captures(board, tr, tc, p, self._chain_jumped)
             if found:
                 self.in_chain = True
                 self.selected = (tr, tc)
@@ -391,73 +779,116 @@ class CheckersGame:
                 return
 
         # Promotion
-        if p['c'] == 'white' and tr == 0: p['k'] = True
-        if p['c'] == 'black' and tr == 7: p['k'] = True
+        if (p == WHITE_MAN and tr == 0) or (p == BLACK_MAN and tr == 7):
+            board[dst] = p + 2 # BLACK_MAN -> BLACK_KING, WHITE_MAN -> WHITE_KING
+            self.zkey ^= ZOBRIST[dst][p] ^ ZOBRIST[dst][p + 2]
         
         self.in_chain = False
+        self._chain_jumped = 0
         self.selected = None
         self.valid_moves = []
         self.end_turn()
 
     def end_turn(self):
-        bc = sum(1 for r in range(8) for c in range(8) if self.board[r][c] and self.board[r][c]['c']=='black')
-        wc = sum(1 for r in range(8) for c in range(8) if self.board[r][c] and self.board[r][c]['c']=='white')
-        if bc == 0:
-            messagebox.showinfo("Finish", "Red won!"); self.game_over = True; return
-        if wc == 0:
-            messagebox.showinfo("Finish", "White won!"); self.game_over = True; return
+        self._legal_cache_key = None
+        board = self.board_flat
+        # Only presence matters here, and a byte search stops at the first hit
+        if BLACK_MAN not in board and BLACK_KING not in board: winner = "Red"
+        elif WHITE_MAN not in board and WHITE_KING not in board: winner = "White"
+        else: winner = None
+        if winner:
+            self.stop_hint_search()
+            # The dialog blocks the event loop, so paint the final capture first
+            self.draw(); self.root.update_idletasks()
+            messagebox.showinfo("Finish", f"{winner} won!"); self.game_over = True; return
             
-        self.current_player = "black" if self.current_player == "white" else "white"
+        self.set_player("black" if self.current_player == "white" else "white")
+        self.zkey ^= ZOBRIST_WHITE
         self.turn_counter += 1
         self.hint_move = None
         self.update_info()
         self.draw()
         self.start_hint_calculation()
 
+    def set_player(self, color):
+        self.current_player = color
+        self._ctm_man = WHITE_MAN if color == "white" else BLACK_MAN # side to move as a piece code
+
     def update_info(self):
         if not self.is_running: return
         txt = "Blacks (top)" if self.current_player=='black' else "Reds (bottom)"
         try: self.info.config(text=f"Move: {txt}", fg="black")
         except: pass
 
-    def board_to_int_grid(self, ui_board):
-        grid = [[0]*8 for _ in range(8)]
-        for r in range(8):
-            for c in range(8):
-                p = ui_board[r][c]
-                if p:
-                    if p['c'] == 'black': grid[r][c] = BLACK_KING if p['k'] else BLACK_MAN
-                    else: grid[r][c] = WHITE_KING if p['k'] else WHITE_MAN
-        return grid
+    def board_to_flat(self):
+        self._c_board[:] = self.board_flat
+        return self._c_board
 
     def reset_game_click(self): self.reset_game_logic()
     def reset_game_logic(self):
         self.game_over = False; self.ai_thinking = False; self.hint_move = None; self.in_chain = False
+        self._chain_jumped = 0
         self.selected = None; self.valid_moves = []; self.turn_counter = 1
         self.init_board(); self.draw()
-        if messagebox.askyesno("Select a side", "Reds starting?"): self.current_player = "white"
-        else: self.current_player = "black"
+        self.set_player("white" if messagebox.askyesno("Select a side", "Reds starting?") else "black")
+        self.zkey = self.compute_zkey()
         self.update_info(); self.draw(); self.start_hint_calculation()
 
+    def compute_zkey(self):
+        zkey = ZOBRIST_WHITE if self.current_player == "white" else 0
+        for sq, p in enumerate(self.board_flat):
+            if p: zkey ^= ZOBRIST[sq][p]
+        return zkey
+
+    def start_search_pool(self):
+        if not PARALLEL_SEARCH or self._pool is not None: return
+        workers = os.cpu_count() or 1
+        # One worker would only add IPC to the engine's own iterative deepening
+        if workers < 2: return
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                         initializer=_init_search_worker, initargs=(TT_ENTRIES // workers,))
+        # Workers spawn one per queued task; start them all now so the first search doesn't wait
+        for _ in range(workers): self._pool.submit(os.getpid)
+
+    def stop_hint_search(self):
+        # The position the running search was for is gone: free the engine for the next one.
+        # Its result is never posted, so reset the status here.
+        if self._search_stop is not None:
+            self._search_stop.set()
+            self._search_stop = None
+            self.ai_thinking = False
+            try: self.ai_status.config(text="Waiting", fg="blue")
+            except: pass
+
     def start_hint_calculation(self):
+        self.stop_hint_search()
         if self.game_over or not self.is_running: return
+        cached = self._tt.get(self.zkey)
+        if cached:
+            # Position already searched this session under the same limits
+            move, score, depth = cached
+            self.display_hint(move, self.turn_counter, depth, score)
+            return
         self.ai_thinking = True
         try: self.ai_status.config(text="Thinking...", fg="red")
         except: pass
-        threading.Thread(target=self.manager_thread, args=(self.turn_counter,), daemon=True).start()
-
-    def manager_thread(self, tid):
+        # Snapshot taken on the Tk thread: the next turn refills _c_board (and switches the side)
+        # whether or not this search's thread has reached the engine yet
+        board = (ctypes.c_int * 64).from_buffer_copy(self.board_to_flat())
+        self._search_stop = threading.Event()
+        threading.Thread(target=self.manager_submit, args=(self.turn_counter, self.zkey, self._search_stop, board, self._ctm_man),
+                         daemon=True).start()
+
+    def manager_submit(self, tid, zkey, stop, board, my_color_int):
         try:
-            grid = self.board_to_int_grid(self.board)
-            my_color_int = BLACK_MAN if self.current_player == "black" else WHITE_MAN
-            
             def gui_callback(d, s):
-                if self.is_running: self.gui_queue.put({'type': 'depth_update', 'depth': d, 'score': s})
+                if self.is_running and not stop.is_set(): self.gui_queue.put({'type': 'depth_update', 'depth': d, 'score': s})
             
-            best_move, best_score, depth = self.engine.find_best_move_parallel(grid, my_color_int, gui_callback, self.logger)
+            best_move, best_score, depth = self.engine.find_best_move_parallel(board, my_color_int, gui_callback, self.logger, self._pool, stop)
             
-            if self.is_running:
-                self.gui_queue.put({'type': 'hint_result', 'move': best_move, 'turn': tid, 'depth': depth, 'score': best_score})
+            # A stopped search's hint is for a position that is gone (or a finished game)
+            if self.is_running and not stop.is_set():
+                self.gui_queue.put({'type': 'hint_result', 'move': best_move, 'turn': tid, 'depth': depth, 'score': best_score, 'zkey': zkey})
         except Exception as e:
             self.logger.error(f"Manager Error: {e}"); traceback.print_exc()
 